@@ -0,0 +1,138 @@
+# coding=UTF-8
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""Optional C extension with compiled removal of collisions of discs (used by discs.process_list if built)
+
+Build (in this directory):
+    CFLAGS="-O3 -ffast-math -march=native" cythonize -i -3 _discs_core.pyx
+"""
+
+import numpy as np
+from libc.math   cimport sqrt, cos, sin, M_PI
+from libc.stdlib cimport rand, srand, RAND_MAX
+
+#przesunięcia komórek sąsiednich siatki sprawdzane dla każdej komórki (tylko "do przodu", aby każda para była sprawdzana raz)
+cdef int[4] NEIGHBOUR_X = [1,-1,0,1]
+cdef int[4] NEIGHBOUR_Y = [0,1,1,1]
+
+cdef inline double _rand() noexcept nogil:              #liczba losowa z przedziału [0, 1)
+    return rand()/(RAND_MAX+1.0)
+
+cdef inline bint _uncollide(double[:] xs, double[:] ys, double[:] rs, double tol, Py_ssize_t n1, Py_ssize_t n2) noexcept nogil:
+    #usunięcie kolizji dwóch dysków (jak discs.separate)
+    cdef double dx = xs[n2]-xs[n1], dy = ys[n2]-ys[n1]
+    cdef double r_sum = rs[n1]+rs[n2]
+    cdef double rt = r_sum*(1-tol)                      #suma promieni z tolerancją (jak discs.OVERLAP_TOL)
+    cdef double l2 = dx*dx+dy*dy, l, c, a
+    if rt*rt <= l2:                                     #brak kolizji
+        return False
+    l = sqrt(l2)
+    c = (r_sum-l)*(1.001+.999*_rand())/2                #przesunięcie każdego z dysków (z losowym zawyżeniem)
+    if l == 0:                                          #pokrywające się środki - rozsunięcie w losowym kierunku (wektor jednostkowy)
+        a = 2*M_PI*_rand()
+        dx = cos(a)
+        dy = sin(a)
+    else:
+        c /= l                                          #wzdłuż wektora pomiędzy środkami
+    xs[n1] -= dx*c
+    ys[n1] -= dy*c
+    xs[n2] += dx*c
+    ys[n2] += dy*c
+    return True
+
+cdef inline bint _push2area(double[:] xs, double[:] ys, double[:] rs, Py_ssize_t n,
+                            double x0, double x1, double y0, double y1) noexcept nogil:
+    #umiejscowienie dysku wychodzącego poza dany obszar, w tym obszarze (jak discs.push2area)
+    cdef double x = xs[n], y = ys[n], r = rs[n]
+    cdef bint flag = False
+    if x - r < x0:
+        xs[n] = x0 + r*(1+_rand())
+        flag = True
+    elif x + r > x1:
+        xs[n] = x1 - r*(1+_rand())
+        flag = True
+    if y - r < y0:
+        ys[n] = y0 + r*(1+_rand())
+        flag = True
+    elif y + r > y1:
+        ys[n] = y1 - r*(1+_rand())
+        flag = True
+    return flag
+
+def sweep_c(double[:] xs, double[:] ys, double[:] rs, double x0, double x1, double y0, double y1, double tol, int m_max):
+    """Perform passes of removal of collisions of discs, until nothing changes.
+    Pairs are found with uniform grid of cells not smaller than largest disc diameter.
+
+    Keyword arguments:
+    xs, ys, rs  -- arrays of discs defined as in discs.Discs
+    x0, x1      -- numeric values of lower, and upper bonds of area along x axis
+    y0, y1      -- numeric values of lower, and upper bonds of area along y axis
+    tol         -- relative tolerance of overlapping of discs (as discs.OVERLAP_TOL)
+    m_max       -- maximal number of passes
+    Random offsets come from C rand(), seeded from numpy.random at each call, as discs.sweep seeds its generator (runs are reproducible with numpy.random.seed).
+    Returns:
+    flag        -- boolean which determines if discs were modified during last pass
+    m           -- number of performed passes
+    """
+    cdef Py_ssize_t n = xs.shape[0]
+    if n == 0:
+        return False, 0
+    srand(np.random.randint(0,2**31-1))                 #ziarno generatora C z numpy.random (jak ziarno przekazywane do discs.sweep)
+    cdef double cell = 2*np.max(rs)                     #bok komórki siatki - kolidujące dyski leżą w tej samej, lub sąsiednich komórkach
+    if cell <= 0:                                       #dyski o zerowych promieniach nie kolidują - jedna komórka obejmująca cały obszar
+        cell = max(x1-x0,y1-y0,1.)
+    while ((x1-x0)/cell+1)*((y1-y0)/cell+1) > 4*n:      #ograniczenie ilości komórek (większe komórki są nadal poprawne)
+        cell *= 2
+    cdef int ncx = <int>((x1-x0)/cell)+1, ncy = <int>((y1-y0)/cell)+1
+    cdef int[:] cell_head = np.empty(ncx*ncy,dtype=np.intc)     #pierwszy dysk w każdej komórce (-1 jeżeli pusta)
+    cdef int[:] cell_next = np.empty(n,dtype=np.intc)           #następny dysk w tej samej komórce (lista jednokierunkowa)
+    cdef unsigned char[:] dirty = np.ones(n,dtype=np.uint8)     #dyski przesunięte w poprzednim przebiegu
+    cdef unsigned char[:] moved = np.zeros(n,dtype=np.uint8)    #dyski przesunięte w tym przebiegu
+    cdef Py_ssize_t i, k
+    cdef int cx, cy, nx, ny, h, a, b
+    cdef bint flag = True, pair_flag, area_flag
+    cdef int m = 0
+    with nogil:
+        while flag and m < m_max:                       #pętla działająca dopóki wprowadzane są zmiany
+            pair_flag = False
+            area_flag = False
+            m += 1
+            cell_head[:] = -1                           #przebudowa siatki
+            for i in range(n):
+                cx = min(max(<int>((xs[i]-x0)/cell),0),ncx-1)
+                cy = min(max(<int>((ys[i]-y0)/cell),0),ncy-1)
+                h = cy*ncx+cx
+                cell_next[i] = cell_head[h]
+                cell_head[h] = <int>i
+                moved[i] = 0
+            for cy in range(ncy):                       #usuwanie kolizji dla par dysków z tych samych, lub sąsiednich komórek
+                for cx in range(ncx):
+                    a = cell_head[cy*ncx+cx]
+                    while a != -1:
+                        b = cell_next[a]                #pary wewnątrz komórki
+                        while b != -1:
+                            if (dirty[a] or dirty[b]) and _uncollide(xs,ys,rs,tol,a,b):
+                                pair_flag = True
+                                moved[a] = 1
+                                moved[b] = 1
+                            b = cell_next[b]
+                        for k in range(4):              #pary z komórkami sąsiednimi
+                            nx = cx+NEIGHBOUR_X[k]
+                            ny = cy+NEIGHBOUR_Y[k]
+                            if nx < 0 or nx >= ncx or ny >= ncy:
+                                continue
+                            b = cell_head[ny*ncx+nx]
+                            while b != -1:
+                                if (dirty[a] or dirty[b]) and _uncollide(xs,ys,rs,tol,a,b):
+                                    pair_flag = True
+                                    moved[a] = 1
+                                    moved[b] = 1
+                                b = cell_next[b]
+                        a = cell_next[a]
+            if pair_flag or m == 1:                     #jeżeli żaden dysk nie został przesunięty, żaden nie mógł opuścić obszaru
+                for i in range(n):
+                    if _push2area(xs,ys,rs,i,x0,x1,y0,y1):
+                        area_flag = True
+                        moved[i] = 1
+            flag = pair_flag or area_flag
+            dirty[:] = moved
+    return flag, m
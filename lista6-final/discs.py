@@ -1,13 +1,23 @@
 # coding=UTF-8
-"""Module provides basic handling of vectors, discs and collision detection
+"""Module provides basic handling of discs and collision detection
 """
 
-from random     import uniform                              #funkcja do generowania losowych liczb z predziału
-from itertools  import combinations, islice, cycle          #kombinacje, zwracanie tablic wartości z generatorów i zapętlony iterator
+from itertools  import islice, cycle                        #zwracanie tablic wartości z generatorów i zapętlony iterator
+from random     import random as _rand, seed as _seed       #liczba losowa z przedziału [0, 1) i ziarno generatora
 from time       import time                                 #pomiar czasu
-from matplotlib import pyplot       as plt                  #graficzna reprezentacja
+from math       import sqrt, cos, sin, pi                   #pierwiastek kwadratowy i kierunek losowy
+from collections import namedtuple                          #krotki z nazwanymi polami
+import numpy as np                                          #operacje na tablicach liczb
 from os         import environ                              #modyfikowanie zmiennych środowiskowych (tłumienie logów QT)
 from warnings   import warn                                 #ostrzeżenia
+try:
+    from numba  import njit                                 #kompilacja JIT (opcjonalna)
+except ImportError:                                         #brak biblioteki numba
+    njit = None                                             #używana będzie wersja numpy
+try:
+    from _discs_core import sweep_c                         #rozszerzenie w C (opcjonalne, budowanie opisane w _discs_core.pyx)
+except ImportError:                                         #rozszerzenie nie zostało zbudowane
+    sweep_c = None                                          #używana będzie wersja numba, lub numpy
 
 #przykładowa paleta kolorów
 STD_PALETTE =  ('#DC3522',
@@ -28,9 +38,24 @@ STD_PALETTE =  ('#DC3522',
                 '#030e20',
                 '#010710')
 
+#ilość iteracji, po której wyświetlane jest ostrzeżenie
+MAX_ITER = 120
+
+#ilość kroków wersji numpy, po której wyświetlane jest ostrzeżenie (pary sprawdzane w losowej kolejności - średnio o około jedną trzecią więcej kroków niż przebiegów sweep)
+MAX_STEPS = MAX_ITER*3//2
+
+#względna tolerancja nachodzenia dysków - zapobiega nieskończonej pętli, gdy przesunięcie jest mniejsze od dokładności liczb zmiennoprzecinkowych
+OVERLAP_TOL = 1e-9
+
+#przesunięcia komórek sąsiednich siatki sprawdzane dla każdej komórki (tylko "do przodu", aby każda para była sprawdzana raz)
+GRID_NEIGHBOURS = ((1,0),(-1,1),(0,1),(1,1))
+
 #wiadomość ostrzeżenia o dużej ilości iteracji
 WARNING_MSG = "\n\033[93mToo much iterations could be result of too many, or too large discs on too small area. \nConsider stopping program (CTRL+C) and modifing input data.\033[0m"
 
+#dyski przechowywane jako trzy równoległe tablice numpy (float64): współrzędne środków i promienie
+Discs = namedtuple('Discs',('xs','ys','rs'))
+
 def suppress_qt_debug():                                    #wyłączenie wyświetlania zbędnych informacji z biblioteki QT pochodzącej z matplotlib
     """suppresss useless QT informations.
 
@@ -45,206 +70,321 @@ def suppress_qt_debug():                                    #wyłączenie wyświ
     except KeyError:                                        #jeżeli już zmodyfikowano
         pass                                                #nie rób nic
 
-def make_vec(x,y):                                                              #utworzenie wektora
-    """Form a vector.
+def jit(func):                                                                  #kompilacja funkcji numerycznych (jeżeli numba jest dostępna)
+    """Compile numeric function with numba, if it is available.
 
     Keyword arguments:
-    x, y    -- real numbers, coordinates in cartesian form
+    func    -- function operating on numbers, and numpy arrays
     Returns:
-    [x, y]  -- list of coordinates
+            -- compiled function, or func itself if numba is not available
     """
-    return [x,y]
+    if njit is None:
+        return func
+    return njit(fastmath=True,cache=True)(func)
 
-def add_vec(vec1,vec2,c=1):                                                     #suma dwóch wektorów
-    """Add two vectors.
+def gen_discs(n=100,area=((-15,15),(-15,15)),r_lims=(.5,.5)):                   #generowanie n dysków na zadanym obszarze, o promieniu z zadanego przedziału
+    """Generate random discs on given area.
 
     Keyword arguments:
-    vec1, vec2  -- vectors defined as in make_vec function
-    c           -- value to multiply second vector by (positive 1 by default)
+    n       -- number of discs to generate
+    area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
+    r_lims  -- iterable container of numeric values of lower, and upper bonds of radius
     Returns:
-                -- vector defined as in make_vec function
+    dlist   -- discs defined as in Discs
     """
-    return [vec1[0]+c*vec2[0],vec1[1]+c*vec2[1]]
-
-def make_disc(x,y,r):                                                           #utworzenie dysku ze współrzędnych i promienia
-    """Form disc from coordinates and radius.
+    data = np.empty((3,n))                                                                      #jedna tablica na wszystkie dyski (wiersze: x, y, r)
+    xs, ys, rs = data                                                                           #widoki wierszy tablicy
+    rs[:] = np.random.uniform(r_lims[0],r_lims[1],size=n)                                      #generowania losowych promieni
+    xs[:] = np.random.uniform(area[0][0]+rs,area[0][1]-rs)                                      #generowanie losowych pozycji na danym obszarze
+    ys[:] = np.random.uniform(area[1][0]+rs,area[1][1]-rs)
 
-    Keyword arguments:
-    x, y        -- real numbers, coordinates in cartesian form
-    r           -- real number, value of disc radius
-    Returns:
-    ([x, y], r) -- tuple of vector, and radius
-    """
-    return ([x,y],r)
+    return Discs(xs,ys,rs)                                                                      #zwrócenie dysków
 
-def make_disc_vec(vec,r):                                                       #utworzenie dysku z wektora i promienia
-    """Form disc from vector and radius.
+@jit
+def separate(xs,ys,rs,n1,n2,dx,dy,l2):                  #rozsunięcie dwóch nachodzących na siebie dysków
+    """Move apart two overlapping discs, whose collision was already detected.
 
     Keyword arguments:
-    vec         -- vector defined as in make_vec function
-    r           -- real number, value of disc radius
+    xs, ys, rs  -- arrays of discs defined as in Discs
+    n1, n2      -- indexes of discs
+    dx, dy      -- coordinates of vector from center of first, to center of second disc
+    l2          -- squared length of this vector
     Returns:
-    (vec, r)    -- tuple of vector, and radius
+                -- nothing (None type)
     """
-    return (vec, r)
-                                                                                
-def move_disc(disc, vec, c=1):                                                  #przesunięcie dysku
-    """Move disc by given vector.
+    x1, y1, x2, y2 = xs[n1], ys[n1], xs[n2], ys[n2]     #współrzędne środków dysków
+    r_sum = rs[n1]+rs[n2]                               #suma promieni obydwu okręgów
+    l = sqrt(l2)                                        #długość wektora zdefiniowanego wyżej
+    x = r_sum-l                                         #określenie długości odcinka znajdującego się na prostej łączącej środki okręgów, 
+    #                                                    zdefiniowanego na ich części wspólnej
+    x *= 1.001+.999*_rand()                             #fragment uniemożliwiający powstanie potencjalnie nieskończonej pętli
+    #                                                    wprowadzenie do przesunięcia losowego błędu zawyżenia odległości od 0.1% do 100%
+    #                                                    graficzna reprezentacja: https://www.geogebra.org/m/ztyav7qw
+    if l == 0:                                          #pokrywające się środki - rozsunięcie w losowym kierunku (wektor jednostkowy)
+        a = 2*pi*_rand()
+        dx, dy, l = cos(a), sin(a), 1.
+    c = x/(2*l)                                         #każdy z dysków przesuwany jest o połowę x (wektor dx, dy ma długość l)
 
-    Keyword arguments:
-    disc    -- disc defined as in make_disc, or make_disc_vec functions
-    vec     -- vector defined as in make_vec function
-    c       -- value to multiply vector by (positive 1 by default)
-    Returns:
-            -- nothing (None type)
-    """
-    disc[0][0] += c*vec[0]
-    disc[0][1] += c*vec[1]
+    xs[n1] = x1-dx*c                                    #przemieszczanie dysków od środka pomiędzy nimi, wzdłuż prostej opartej na wektorze pomiędzy ich środkami
+    ys[n1] = y1-dy*c
+    xs[n2] = x2+dx*c
+    ys[n2] = y2+dy*c
 
-def vec_len(vec):                                                               #długość wektora
-    """Return length of given vector.
+@jit
+def push2area(xs,ys,rs,n,x0,x1,y0,y1):                  #umiejscowienie dysków wychodzących poza dany obszar, w tym obszarze
+    """Push exceeding disc to given area
 
     Keyword arguments:
-    vec     -- vectors defined as in make_vec function
+    xs, ys, rs  -- arrays of discs defined as in Discs
+    n           -- index of disc
+    x0, x1      -- numeric values of lower, and upper bonds of area along x axis
+    y0, y1      -- numeric values of lower, and upper bonds of area along y axis
     Returns:
-            -- numeric value of length
+    flag        -- boolean which determines if disc were modified or not
     """
-    return (vec[0]**2+vec[1]**2)**.5
+    x, y, r = xs[n], ys[n], rs[n]                               #położenie i promień dysku
+    flag = False                                                #flaga określająca czy zostały wprowadzone jakieś zmiany
+    #sprawdzenie czy okrąg znajduje się w obrębie danego obszaru
+    if x - r < x0:
+        xs[n] = x0 + r*(1+_rand())
+        flag = True
+    elif x + r > x1:
+        xs[n] = x1 - r*(1+_rand())
+        flag = True
+    if y - r < y0:
+        ys[n] = y0 + r*(1+_rand())
+        flag = True
+    elif y + r > y1:
+        ys[n] = y1 - r*(1+_rand())
+        flag = True
+    return flag                                                  #zwrócenie flagi
 
-def len_from_disc(disc):                                                        #długość wektora od początku układu współrzędnych do środka dysku
-    """Return length of vector from origin, to center of disc.
+@jit
+def sweep(xs,ys,rs,x0,x1,y0,y1,m_max,seed):                   #usuwanie kolizji wszystkich par dysków aż do braku zmian (wersja kompilowana)
+    """Perform passes of removal of collisions of all pairs of discs, until nothing changes.
+    Pairs are pruned by sorting discs along x axis in each pass.
 
     Keyword arguments:
-    disc    -- disc defined as in make_disc, or make_disc_vec functions
+    xs, ys, rs  -- arrays of discs defined as in Discs
+    x0, x1      -- numeric values of lower, and upper bonds of area along x axis
+    y0, y1      -- numeric values of lower, and upper bonds of area along y axis
+    m_max       -- maximal number of passes
+    seed        -- integer seed of generator of random offsets (numba keeps its own generator, not seeded from Python)
     Returns:
-            -- numeric value of length
+    flag        -- boolean which determines if discs were modified during last pass
+    m           -- number of performed passes
     """
-    return (disc[0][0]**2+disc[0][1]**2)**.5
-
-def gen_discs(n=100,area=((-15,15),(-15,15)),r_lims=(.5,.5)):                   #generowanie n dysków na zadanym obszarze, o promieniu z zadanego przedziału
-    """Generate random discs on given area.
+    _seed(seed)                                         #ziarno generatora wersji kompilowanej (powtarzalność wyników)
+    n = len(xs)                                         #ilość dysków
+    flag = True                                         #flaga zmian
+    m = 0
+    dirty = np.ones(n,dtype=np.bool_)                   #dyski przesunięte w poprzednim przebiegu (na początku wszystkie)
+    while flag and m < m_max:                           #pętla działająca dopóki wprowadzane są zmiany
+        pair_flag = False                               #flaga zmian wprowadzonych przez usuwanie kolizji
+        area_flag = False                               #flaga zmian wprowadzonych przez przesunięcie na obszar
+        moved = np.zeros(n,dtype=np.bool_)              #dyski przesunięte w tym przebiegu
+        m += 1
+        order = np.argsort(xs-rs)                       #indeksy dysków uporządkowane według lewej krawędzi (sweep and prune)
+        lefts = (xs-rs)[order]                          #lewe krawędzie w chwili sortowania - przerwanie pętli nie pomija par dysków, które się nie poruszyły
+        for p in range(n):                              #usuwanie kolizji dla par dysków nachodzących na siebie wzdłuż osi x
+            i = order[p]
+            right = xs[i]+rs[i]                         #prawa krawędź dysku
+            for q in range(p+1,n):
+                if lefts[q] > right:        break       #kolejne dyski zaczynają się dalej - brak możliwych kolizji z dyskiem i
+                j = order[q]
+                if not (dirty[i] or dirty[j]):  continue    #żaden z dysków nie poruszył się od ostatniego sprawdzenia pary
+                dx, dy = xs[j]-xs[i], ys[j]-ys[i]       #test kolizji w pętli - wywołanie separate tylko dla nachodzących na siebie par
+                l2 = dx*dx+dy*dy                        #kwadrat odległości środków
+                rt = (rs[i]+rs[j])*(1-OVERLAP_TOL)      #suma promieni z tolerancją nachodzenia (porównanie kwadratów - bez pierwiastkowania)
+                if l2 < rt*rt:
+                    separate(xs,ys,rs,i,j,dx,dy,l2)
+                    pair_flag = True
+                    moved[i] = True
+                    moved[j] = True
+        if pair_flag or m == 1:                         #jeżeli żaden dysk nie został przesunięty, żaden nie mógł opuścić obszaru
+            for i in range(n):                          #upewnienie się czy wszystkie dyski pozostały na danym obszarze
+                if push2area(xs,ys,rs,i,x0,x1,y0,y1):
+                    area_flag = True
+                    moved[i] = True
+        flag = pair_flag or area_flag
+        dirty = moved
+    return flag, m
+
+def grid_pairs(dlist,cell):                             #pary dysków mogących ze sobą kolidować
+    """Return pairs of indexes of discs lying in the same, or neighbouring cells of uniform grid.
 
     Keyword arguments:
-    n       -- number of discs to generate
-    area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
-    r_lims  -- iterable container of numeric values of lower, and upper bonds of radius
+    dlist   -- discs defined as in Discs
+    cell    -- real number, length of side of grid cell (not smaller than largest diameter of disc)
     Returns:
-    dlist   -- list of discs
+    ii, jj  -- arrays of indexes of discs in pairs (each pair once)
     """
-    dlist = [None]*n                                                                            #inicjalizacja listy
-    for i in range(n):
-        r           = uniform(r_lims[0],r_lims[1])                                              #generowania losowego promienia
-        posx, posy  = uniform(area[0][0]+r,area[0][1]-r), uniform(area[1][0]+r, area[1][1]-r)   #generowanie losowej pozycji na danym obszarze
-        dlist[i]    = make_disc(posx,posy,r)                                                    #dodanie nowego dysku do listy
-
-    return dlist                                                                                #zwrócenie listy
-
-def uncollide(dlist,n1,n2):                             #usunięcie kolizji dwóch dysków z listy
-    """Uncollide two discs from list of discs.
+    n = len(dlist.xs)                                   #ilość dysków
+    if n < 2:                                           #brak par
+        return np.empty(0,dtype=np.intp), np.empty(0,dtype=np.intp)
+    cx = np.floor(dlist.xs/cell).astype(np.int64)       #współrzędne komórek zawierających środki dysków
+    cy = np.floor(dlist.ys/cell).astype(np.int64)
+    cx -= cx.min()
+    cy -= cy.min()
+    w = cx.max()+2                                      #szerokość siatki z pustą kolumną - sąsiednie komórki nie przechodzą do innego wiersza
+    key = cy*w+cx                                       #numer komórki każdego dysku
+    order = np.argsort(key,kind='stable')               #indeksy dysków uporządkowane według komórek
+    skey = key[order]
+    rank = np.empty(n,dtype=np.intp)                    #pozycja każdego dysku w tym uporządkowaniu
+    rank[order] = np.arange(n)
+    ii, jj = [], []
+    for ox,oy in ((0,0),)+GRID_NEIGHBOURS:              #pary wewnątrz komórki, oraz z komórkami sąsiednimi
+        nkey = key+oy*w+ox                              #numer sprawdzanej komórki
+        if ox == 0 and oy == 0:
+            lo = rank+1                                 #wewnątrz komórki - tylko dyski dalej w uporządkowaniu (każda para raz)
+        else:
+            lo = np.searchsorted(skey,nkey,'left')
+        hi = np.searchsorted(skey,nkey,'right')
+        cnt = np.maximum(hi-lo,0)                       #ilość par każdego dysku z dyskami z tej komórki
+        total = cnt.sum()
+        if total == 0:  continue
+        offs = np.arange(total)-np.repeat(np.cumsum(cnt)-cnt,cnt)  #kolejne pozycje w zakresach dysków danej komórki
+        ii.append(np.repeat(np.arange(n),cnt))
+        jj.append(order[np.repeat(lo,cnt)+offs])
+    if not ii:                                          #brak par w sąsiednich komórkach
+        return np.empty(0,dtype=np.intp), np.empty(0,dtype=np.intp)
+    return np.concatenate(ii), np.concatenate(jj)       #zwrócenie par
+
+def uncollide_all(dlist,cell,dirty=None):               #usunięcie kolizji wszystkich par dysków (wersja numpy)
+    """Check each pair of discs once, and uncollide colliding ones, in rounds in which each disc is moved in at most one pair.
+    Pairs are found with uniform grid, as in grid_pairs function.
 
     Keyword arguments:
-    dlist   -- list of discs
-    n1, n2  -- indexes of discs in list of discs
+    dlist   -- discs defined as in Discs
+    cell    -- real number, length of side of grid cell (not smaller than largest diameter of disc)
+    dirty   -- boolean array of discs moved since last check (all discs by default), pairs of two other discs are skipped
     Returns:
-            -- boolean which determines if discs were modified or not
+    touched -- boolean array of discs found in colliding pairs, which should be checked again
     """
-    between = add_vec(dlist[n2][0],dlist[n1][0],-1)     #utworzenie wektora symbolizującego odcinek pomiędzy środkami dwóch okręgów
-    r_sum = dlist[n1][1]+dlist[n2][1]                   #suma promieni obydwu okręgów
-    l = vec_len(between)                                #długość wektora zdefiniowanego wyżej
-    if r_sum > l:                                       #jeżeli dyski na siebie nachodzą
-        mid = [x/2 for x in between]                    #środek tego wektora
-        l = vec_len(between)                            #długość wektora zdefiniowanego wyżej
-        x = r_sum-l                                     #określenie długości odcinka znajdującego się na prostej łączącej środki okręgów, 
-    #                                                    zdefiniowanego na ich części wspólnej
-        x *= uniform(1.001,2)                           #fragment uniemożliwiający powstanie potencjalnie nieskończonej pętli
-    #                                                    wprowadzenie do przesunięcia losowego błędu zawyżenia odległości od 0.1% do 100%
-    #                                                    graficzna reprezentacja: https://www.geogebra.org/m/ztyav7qw
-        l_mid = l/2                                     #połowa długości wektora zdefiniowanego wyżej
-
-        move_disc(dlist[n1], mid, -(x/(2*l_mid)))       #przemieszczanie dysków od środka pomiędzy nimi, wzdłuż prostej opartej na wektorze pomiędzy ich środkami
-        move_disc(dlist[n2], mid, (x/(2*l_mid)))
-        return True                                     #zwróć prawda jeżeli zmiana
-    else:                                               
-        return False                                    #zwróć fałsz jeśli nie było kolizji
-
-def push2area(dlist,n,area):                            #umiejscowienie dysków wychodzących poza dany obszar, w tym obszarze
-    """Push exceeding disc from list to given area
+    xs, ys, rs = dlist
+    n = len(xs)                                         #ilość dysków
+    ii, jj = grid_pairs(dlist,cell)                     #pary dysków z tych samych, lub sąsiednich komórek siatki
+    if dirty is not None:                               #tylko pary zawierające dyski przesunięte od ostatniego sprawdzenia
+        sel = dirty[ii] | dirty[jj]
+        ii, jj = ii[sel], jj[sel]
+    touched = np.zeros(n,dtype=bool)                    #dyski z kolidujących par
+    perm = np.random.permutation(len(ii))               #losowa kolejność par
+    ii, jj = ii[perm], jj[perm]
+    while len(ii):                                      #rundy sprawdzania par, dopóki każda para nie zostanie sprawdzona raz (jak jeden przebieg sweep)
+        k = len(ii)                                     #ilość pozostałych par
+        pos = np.arange(k)
+        first = np.full(n,k)                            #pozycja pierwszej pary, w której występuje każdy z dysków
+        np.minimum.at(first,ii,pos)
+        np.minimum.at(first,jj,pos)
+        keep = (first[ii] == pos) & (first[jj] == pos)  #pary, w których oba dyski występują po raz pierwszy - jednoczesne przesunięcia nie znoszą się
+        a, b = ii[keep], jj[keep]
+        ii, jj = ii[~keep], jj[~keep]                   #pary pozostawione na kolejne rundy
+        dx, dy = xs[b]-xs[a], ys[b]-ys[a]               #wektory pomiędzy środkami (po przesunięciach z poprzednich rund)
+        d2 = dx*dx+dy*dy                                #kwadraty odległości środków
+        rsum = rs[a]+rs[b]                              #sumy promieni
+        rtol = rsum*(1-OVERLAP_TOL)                     #sumy promieni z tolerancją nachodzenia
+        hit = np.flatnonzero(d2 < rtol*rtol)            #nachodzące na siebie pary
+        a, b, dx, dy, d2, rsum = a[hit], b[hit], dx[hit], dy[hit], d2[hit], rsum[hit]
+        touched[a] = True
+        touched[b] = True
+        l = np.sqrt(d2)                                 #odległości środków kolidujących dysków
+        x = (rsum-l)*.5*np.random.uniform(1.001,2,size=len(a))  #przesunięcie każdego z dysków (z losowym zawyżeniem, jak w separate)
+        same = np.flatnonzero(l == 0)                   #pokrywające się środki - rozsunięcie w losowym kierunku (wektor jednostkowy)
+        if len(same):
+            ang = np.random.uniform(0,2*pi,size=len(same))
+            dx[same], dy[same], l[same] = np.cos(ang), np.sin(ang), 1.
+        c = x/l                                         #przesunięcie wzdłuż wektora pomiędzy środkami
+        shift_x, shift_y = dx*c, dy*c
+        xs[a] -= shift_x                                #przemieszczenie dysków od siebie
+        ys[a] -= shift_y
+        xs[b] += shift_x
+        ys[b] += shift_y
+    return touched                                      #zwrócenie dysków z kolidujących par
+
+def push2area_all(dlist,area):                          #umiejscowienie wszystkich dysków wychodzących poza dany obszar, w tym obszarze
+    """Push all exceeding discs to given area at once.
 
     Keyword arguments:
-    dlist   -- list of discs
-    n       -- index of disc in list
+    dlist   -- discs defined as in Discs
     area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
     Returns:
-    flag    -- boolean which determines if disc were modified or not
+    moved   -- boolean array of discs which were modified
     """
-    flag = False                                                #flaga określająca czy zostały wprowadzone jakieś zmiany
-    #sprawdzenie czy okrąg znajduje się w obrębie danego obszaru
-    if dlist[n][0][0] - dlist[n][1] < area[0][0]:
-        dlist[n][0][0] = area[0][0] + dlist[n][1]*uniform(1,2)
-        flag = True
-    elif dlist[n][0][0] + dlist[n][1] > area[0][1]:
-        dlist[n][0][0] = area[0][1] - dlist[n][1]*uniform(1,2)
-        flag = True
-    if dlist[n][0][1] - dlist[n][1] < area[1][0]:
-        dlist[n][0][1] = area[1][0] + dlist[n][1]*uniform(1,2)
-        flag = True
-    elif dlist[n][0][1] + dlist[n][1] > area[1][1]:
-        dlist[n][0][1] = area[1][1] - dlist[n][1]*uniform(1,2)
-        flag = True
-    return flag                                                  #zwrócenie flagi
-
-def process_list(dlist,area):                       #przetworzenie listy dysków pod kątem usunięcia kolizji i utrzymania dysków na zadanym obszarze
-    """Perform removal of collisions of discs on list inside given area.
+    rs = dlist.rs
+    moved = np.zeros(len(rs),dtype=bool)                #dyski przesunięte na obszar
+    for cs,(c0,c1) in zip((dlist.xs,dlist.ys),area):    #dla obu osi
+        low, high = c0+rs, c1-rs                        #dopuszczalne położenia środków dysków
+        clipped = np.clip(cs,low,high)                  #dosunięcie wystających dysków do krawędzi obszaru
+        out = clipped != cs                             #dyski które zostały przesunięte wzdłuż tej osi
+        if out.any():
+            jitter = rs[out]*np.random.uniform(0,1,size=out.sum())  #losowe odsunięcie od krawędzi (jak w push2area)
+            clipped[out] += np.where(cs[out] < low[out],jitter,-jitter)  #w stronę wnętrza obszaru
+            cs[:] = clipped
+            moved |= out
+    return moved                                        #zwrócenie przesuniętych dysków
+
+def process_list(dlist,area):                       #przetworzenie dysków pod kątem usunięcia kolizji i utrzymania dysków na zadanym obszarze
+    """Perform removal of collisions of discs inside given area.
 
     Keyword arguments:
-    dlist   -- list of discs
+    dlist   -- discs defined as in Discs
     area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
     Returns:
             -- nothing (None type)
     """
-    n = len(dlist)                                  #ilość elementów listy
-    combs = tuple(combinations(range(n),2))         #przechowania kombinacji dwuelementowych indeksów listy
-    rng = tuple(range(n))                           #przechowanie listy indeksów
+    n = len(dlist.xs)                               #ilość dysków
+    x0, x1, y0, y1 = (float(a) for a in (*area[0],*area[1]))   #granice obszaru
+    cell = 2*dlist.rs.max() if n else 0.            #bok komórki siatki (wersja numpy) - kolidujące dyski leżą w tej samej, lub sąsiednich komórkach
+    if cell <= 0:                                   #dyski o zerowych promieniach nie kolidują - dowolny bok komórki
+        cell = 1.
     flag = True                                     #flaga zmian listy
+    dirty = np.ones(n,dtype=bool)                   #dyski do sprawdzenia w kolejnym kroku (wersja numpy)
     m = 0
+    m_warn = MAX_STEPS if sweep_c is None and njit is None else MAX_ITER    #ilość iteracji, po której wyświetlane jest ostrzeżenie
     print('Removing collisions of',n,'elements...') #info
-    print('Checking {} pairs of discs per iteration.'.format(int((n-1)*n*.5)))
+    print('Checking up to {} pairs of discs per iteration.'.format(int((n-1)*n*.5)))
     begin = time()                                  #początek pomiaru czasu
     while flag:                                     #pętla działająca dopóki wprowadzane są zmiany
         #print('...')
-        flag = False                                #wstępna wartość flagi dla rozpocząecia pętli - fałsz
-        m += 1
-        for i in combs:                             #usuwanie kolizji dla par wszystkich dysków z listy
-            if uncollide(dlist,i[0],i[1]):  flag = True
-        for i in rng:                               #upewnienie się czy wszystkie dyski pozostały na danym obszarze
-            if push2area(dlist,i,area):     flag = True
-        if m > 120:                                 #ostrzeżenie o dużej ilości iteracji
+        if sweep_c is not None:                     #rozszerzenie w C - cała pętla wykonywana w sweep_c
+            flag, k = sweep_c(*dlist,x0,x1,y0,y1,OVERLAP_TOL,MAX_ITER)
+            m += k
+        elif njit is not None:                      #wersja kompilowana - cała pętla wykonywana w sweep
+            flag, k = sweep(*dlist,x0,x1,y0,y1,MAX_ITER,np.random.randint(0,2**31-1))
+            m += k
+        else:                                       #wersja numpy
+            m += 1
+            dirty = uncollide_all(dlist,cell,dirty)     #usuwanie kolizji dla par zawierających dyski przesunięte w poprzednim kroku
+            if dirty.any() or m == 1:               #upewnienie się czy wszystkie dyski pozostały na danym obszarze (tylko po zmianach)
+                dirty |= push2area_all(dlist,area)
+            flag = dirty.any()
+        if flag and m >= m_warn:                    #ostrzeżenie o dużej ilości iteracji
             warn(\
                 WARNING_MSG,category=RuntimeWarning)
     end = time()                                    #koniec pomiaru czasu
     print('Done in {:.3f} sec. and {} iterations.'.format(end-begin,m))    #info
 
-def dlist2plot(dlist,ax, palette=None):                 #dodanie listy dysków do obiektu typu axes biblioteki matplotlib
-    """Add list of discs to plot.
+def dlist2plot(dlist,ax, palette=None):                 #dodanie dysków do obiektu typu axes biblioteki matplotlib
+    """Add discs to plot.
 
     Keyword arguments:
-    dlist   -- list of discs
+    dlist   -- discs defined as in Discs
     ax      -- pyplot axes object
     palette -- iterable container of pyplot compatible color definitions
     Returns:
             -- nothing (None type)
     """
-    n = len(dlist)                                      #ilość elementów na liście
-    p = None                                            #przygotowanie zmiennej określającej czy została wprowadzona paleta kolorów
+    from matplotlib.collections import EllipseCollection    #zbiór elips rysowany jako jeden obiekt
+    from matplotlib.colors import to_rgba_array             #zamiana definicji kolorów na tablicę RGBA
+    n = len(dlist.xs)                                   #ilość dysków
     if palette == None:                                 #jeżeli nie wprowadzono palety
-        clr = '#5B9279'                                 #dyski będą wyświetlane w takim kolorze
-        p = False                                       #zmienna ustawiona na fałsz
+        clr = to_rgba_array('#5B9279')                  #dyski będą wyświetlane w takim kolorze
     else:                                               #jeżeli wrpowadzono paletę
-        clr = [x for x in islice(cycle(palette),n)]     #utwórz listę kolorów dla każdego elementu listy (kolory stałe dla pozycji dysku na liście)
-        p = True                                        #zmienna ustawiona na prawdę
+        clr = to_rgba_array(list(islice(cycle(palette),n)))  #utwórz tablicę kolorów dla każdego dysku (kolory stałe dla pozycji dysku)
 
-    for i,disc in enumerate(dlist):                     #dla wszystkich dysków na liście
-        ax.add_patch(plt.Circle((disc[0][0],disc[0][1]),disc[1],alpha=.4,color=(clr[i] if p else clr))) #dodaj do wyświetlenia okrąg o zadanych parametrach
+    d = 2*dlist.rs                                      #średnice dysków
+    ax.add_collection(EllipseCollection(d,d,np.zeros_like(d),units='xy',offsets=np.column_stack((dlist.xs,dlist.ys)),
+        offset_transform=ax.transData,alpha=.4,color=clr))  #dodaj do wyświetlenia wszystkie okręgi jako jeden obiekt
 
 def area2plot(area, ax, clr='#600201'):
     """Add area limits to plot.
@@ -256,27 +396,56 @@ def area2plot(area, ax, clr='#600201'):
     Returns:
             -- nothing (None type)
     """
-    ax.add_patch(plt.Rectangle((area[0][0],area[1][0]),area[0][1]-area[0][0],area[1][1]-area[1][0], color=clr, fill=False, linestyle='--'))
+    from matplotlib.patches import Rectangle            #prostokąt
+    ax.add_patch(Rectangle((area[0][0],area[1][0]),area[0][1]-area[0][0],area[1][1]-area[1][0], color=clr, fill=False, linestyle='--'))
 
-def plot_uncolliding(dlist,area, palette=None): #pokaż na wykresie proces usunięcia kolizji dysków z listy
-    """Process and display on plot list of discs.
+def run_uncolliding(dlist,area):                #usunięcie kolizji dysków bez graficznej reprezentacji
+    """Process discs, keeping copy of their initial state.
 
     Keyword arguments:
-    dlist   -- list of discs
+    dlist   -- discs defined as in Discs
+    area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
+    Returns:
+    before  -- copy of discs before processing
+    dlist   -- processed discs (modified in place)
+    """
+    before = Discs(*(a.copy() for a in dlist))  #kopia dysków przed zmianą
+    process_list(dlist,area)                    #usunięcie kolizji na obszarze
+    return before, dlist
+
+def plot_result(before,after,area,palette=None): #pokaż na wykresie dyski przed i po usunięciu kolizji
+    """Display on plot discs before, and after processing.
+
+    Keyword arguments:
+    before  -- discs defined as in Discs, before processing
+    after   -- discs defined as in Discs, after processing
     area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
     palette -- iterable container of pyplot compatible color definitions
     Returns:
             -- nothing (None type)
-    """                                      
+    """
     suppress_qt_debug()                         #wyłączenie informacji debuggera QT
+    from matplotlib import pyplot as plt        #graficzna reprezentacja (importowana dopiero przy rysowaniu)
     plt.close('all')                            #zamknięcie aktywnych okien pyplot
     fig,ax = plt.subplots(nrows=1,ncols=2)      #utworzenie dwóch mniejszych wykresów
-    dlist2plot(dlist,ax[0],palette)             #dodanie dysków z listy do wykresu
-    area2plot(area,ax[0])                       #dodanie obszaru do wykresu
-    process_list(dlist,area)                    #usunięcie kolizji na obszarze
-    dlist2plot(dlist,ax[1],palette)             #dodanie dysków po zmianie do wykresu
-    area2plot(area,ax[1])                       #dodanie obszaru do wykresu
-    [(ax[i].autoscale_view(), ax[i].set_aspect('equal')) for i in range(2)] #dopasowanie skali i stosunku osi dla powyższych wykresów
+    for a,discs in zip(ax,(before,after)):
+        dlist2plot(discs,a,palette)             #dodanie dysków do wykresu
+        area2plot(area,a)                       #dodanie obszaru do wykresu
+        a.autoscale_view()                      #dopasowanie skali i stosunku osi
+        a.set_aspect('equal')
     ax[0].set_title("Before shift")             #dodanie tytułów
     ax[1].set_title("After shift")
-    plt.show()                                  #wyświetlenie wykresów    
\ No newline at end of file
+    plt.show()                                  #wyświetlenie wykresów
+
+def plot_uncolliding(dlist,area, palette=None): #pokaż na wykresie proces usunięcia kolizji dysków z listy
+    """Process and display on plot discs.
+
+    Keyword arguments:
+    dlist   -- discs defined as in Discs
+    area    -- iterable container of two iterable containers of numeric values of lower, and upper bonds, of two different axes (ex. form: [[x_0, x_m],[y_0, y_m]])
+    palette -- iterable container of pyplot compatible color definitions
+    Returns:
+            -- nothing (None type)
+    """
+    before, after = run_uncolliding(dlist,area) #usunięcie kolizji na obszarze
+    plot_result(before,after,area,palette)      #graficzna reprezentacja